@@ -1,15 +1,26 @@
 import sqlite3
 import hashlib
+import hmac
+import os
 import random
 import re
+import threading
+from functools import lru_cache, wraps
 from datetime import date, timedelta
-from flask import Flask, render_template_string, request, redirect, url_for, session, g
+from flask import Flask, get_template_attribute, jsonify, render_template, request, redirect, url_for, session, g
+from flask_caching import Cache
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
 
 # --- Configuration and Constants ---
 DATABASE_NAME = 'guess_the_word.db'
 MAX_GUESSES = 5
 WORD_LENGTH = 5
 MAX_DAILY_GAMES = 3
+PBKDF2_ITERATIONS = 100_000
+MAX_DAILY_REPORT_ROWS = 90 # Longer user histories default to monthly totals
+MAX_REPORT_ROWS = 365 # Cap on rows in the user history report
+SCHEMA_VERSION = 3 # Stored in PRAGMA user_version; bump whenever initialize_db() changes
 SECRET_WORDS = [
     "APPLE", "GRAPE", "JUICE", "LEMON", "PEACH",
     "WORLD", "LIGHT", "HEART", "MONEY", "STORE",
@@ -17,32 +28,78 @@ SECRET_WORDS = [
     "SPACE", "DREAM", "SHIFT", "BREAK", "TRAIN"
 ]
 
+# User history report groupings: SQL period expression and column header
+REPORT_RESOLUTIONS = {
+    'day': ("g.date_played", "Date"),
+    'month': ("strftime('%Y-%m', g.date_played)", "Month"),
+    'year': ("strftime('%Y', g.date_played)", "Year"),
+}
+
+# Validation patterns, compiled once instead of on every registration
+_RE_USER = re.compile(r'[A-Za-z]{5,}')
+_RE_ALPHA = re.compile(r'[A-Za-z]')
+_RE_DIGIT = re.compile(r'\d')
+_RE_SPECIAL = re.compile(r'[$%*@]')
+
+# Store Python bools as 0/1 integers in the BOOLEAN columns
+sqlite3.register_adapter(bool, int)
+
 # Initialize Flask app
 app = Flask(__name__)
 # The secret key is essential for managing sessions (where we store logged-in user info and game state)
 app.secret_key = 'super_secret_game_key_12345' 
+# In-process cache for the admin report queries
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
 
 # --- Database Setup and Connection ---
 
+# One connection per worker thread, reused across requests so SQLite's page and statement caches stay warm
+_local = threading.local()
+
 def get_db_connection():
-    """Opens a new database connection if there is none yet for the current application context."""
-    db = getattr(g, '_database', None)
+    """Returns this thread's database connection, opening it on first use."""
+    db = getattr(_local, 'database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE_NAME)
-        db.row_factory = sqlite3.Row
+        # Rows come back as plain tuples; cursors that want column names set row_factory = sqlite3.Row
+        db = _local.database = sqlite3.connect(DATABASE_NAME, isolation_level=None)
+        # Per-connection tuning; journal_mode=WAL is persistent and set once in initialize_db()
+        db.execute("PRAGMA busy_timeout = 5000")
+        db.execute("PRAGMA synchronous = NORMAL")
+        db.execute("PRAGMA temp_store = MEMORY")
+        db.execute("PRAGMA cache_size = -20000")
+        db.execute("PRAGMA mmap_size = 268435456")
     return db
 
+def _scalar(sql, params=(), db=None):
+    """Runs a query and returns the first column of its first row."""
+    if db is None:
+        db = get_db_connection()
+    return db.execute(sql, params).fetchone()[0]
+
 @app.teardown_appcontext
-def close_connection(exception):
-    """Closes the database connection at the end of the request."""
-    db = getattr(g, '_database', None)
-    if db is not None:
-        db.close()
+def release_connection(exception):
+    """Keeps the thread's connection open for the next request, discarding any unfinished transaction."""
+    db = getattr(_local, 'database', None)
+    if db is not None and db.in_transaction:
+        db.rollback()
+
+def seed_secret_words(conn):
+    """Seeds Secret Words (insert only if not exists)."""
+    conn.executemany("INSERT OR IGNORE INTO secret_words (word) VALUES (?)", [(word,) for word in SECRET_WORDS])
 
 def initialize_db():
-    """Creates tables and seeds initial data if they don't exist."""
-    conn = sqlite3.connect(DATABASE_NAME)
+    """Creates tables and seeds initial data unless the database is already at SCHEMA_VERSION."""
+    conn = sqlite3.connect(DATABASE_NAME, isolation_level=None)
+    # WAL lets readers (e.g. the admin reports) run alongside game writes; it sticks to the file
+    conn.execute("PRAGMA journal_mode = WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        # Schema is current; still pick up words added to SECRET_WORDS since the last migration
+        seed_secret_words(conn)
+        conn.close()
+        return
+
     cursor = conn.cursor()
+    cursor.execute("BEGIN")
 
     # USERS Table
     cursor.execute('''
@@ -86,33 +143,107 @@ def initialize_db():
         );
     ''')
 
-    # Seed Secret Words (insert only if not exists)
-    for word in SECRET_WORDS:
-        try:
-            cursor.execute("INSERT INTO secret_words (word) VALUES (?)", (word,))
-        except sqlite3.IntegrityError:
-            pass
+    # Indexes for the per-user daily limit check, the user history report and guess lookups.
+    # (user_id, date_played, is_won) also covers the user history GROUP BY, so it replaces idx_gh_user_date.
+    # The daily report reads DAILY_STATS, so idx_gh_date_won is no longer needed.
+    cursor.execute("DROP INDEX IF EXISTS idx_gh_user_date;")
+    cursor.execute("DROP INDEX IF EXISTS idx_gh_date_won;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_gh_user_date_won ON game_history(user_id, date_played, is_won);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_gd_history ON guess_details(history_id);")
+
+    # DAILY_STATS Table (Per-day totals for the admin daily report, kept current by the triggers below)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            date_played TEXT PRIMARY KEY,
+            players INTEGER NOT NULL DEFAULT 0,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS gh_daily_stats_insert AFTER INSERT ON game_history
+        BEGIN
+            INSERT INTO daily_stats (date_played, players, games, wins)
+            VALUES (NEW.date_played, 1, 1, NEW.is_won)
+            ON CONFLICT(date_played) DO UPDATE SET
+                players = players + NOT EXISTS (
+                    SELECT 1 FROM game_history
+                    WHERE user_id = NEW.user_id AND date_played = NEW.date_played AND id <> NEW.id
+                ),
+                games = games + 1,
+                wins = wins + excluded.wins;
+        END;
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS gh_daily_stats_update AFTER UPDATE OF is_won ON game_history
+        WHEN NEW.is_won <> OLD.is_won
+        BEGIN
+            UPDATE daily_stats SET wins = wins + NEW.is_won - OLD.is_won WHERE date_played = NEW.date_played;
+        END;
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS gh_daily_stats_delete AFTER DELETE ON game_history
+        BEGIN
+            UPDATE daily_stats SET
+                players = players - NOT EXISTS (
+                    SELECT 1 FROM game_history WHERE user_id = OLD.user_id AND date_played = OLD.date_played
+                ),
+                games = games - 1,
+                wins = wins - OLD.is_won
+            WHERE date_played = OLD.date_played;
+        END;
+    ''')
+    # Rebuild the totals from existing history (a no-op on a fresh database)
+    cursor.execute("DELETE FROM daily_stats;")
+    cursor.execute('''
+        INSERT INTO daily_stats (date_played, players, games, wins)
+        SELECT date_played, COUNT(DISTINCT user_id), COUNT(*), SUM(is_won)
+        FROM game_history
+        GROUP BY date_played;
+    ''')
+
+    seed_secret_words(cursor)
+
+    # Gather statistics so the query planner picks the indexes above
+    cursor.execute("ANALYZE;")
+
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    cursor.execute("COMMIT")
+    conn.close()
+
+_SECRET_WORD_IDS = () # (word, id) pairs from secret_words, so a new game needs no lookup
 
-    conn.commit()
+def load_secret_word_ids():
+    """Caches the secret words and their ids; call again whenever words are added."""
+    global _SECRET_WORD_IDS
+    conn = sqlite3.connect(DATABASE_NAME)
+    _SECRET_WORD_IDS = tuple(conn.execute("SELECT word, id FROM secret_words ORDER BY id"))
     conn.close()
 
 # Ensure DB is initialized before first request
 with app.app_context():
     initialize_db()
+    load_secret_word_ids()
 
 # --- Utility Functions (Adapted from utils.py and auth.py) ---
 
 def hash_password(password):
-    """Hashes a password using SHA-256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hashes a password with salted PBKDF2-HMAC-SHA256, returned as 'salt$hash' in hex."""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+    return f"{salt.hex()}${digest.hex()}"
 
 def check_password(password, hashed_password):
-    """Checks if a password matches the stored hash."""
-    return hash_password(password) == hashed_password
+    """Checks if a password matches the stored hash (also accepts legacy unsalted SHA-256 hashes)."""
+    if '$' not in hashed_password:
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), hashed_password)
+    salt, digest = hashed_password.split('$', 1)
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), PBKDF2_ITERATIONS)
+    return hmac.compare_digest(candidate.hex(), digest)
 
 def validate_username(username):
     """Username must have at least 5 letters (upper/lower case)."""
-    if len(username) < 5 or not re.search(r'[a-zA-Z]{5,}', username):
+    if len(username) < 5 or not _RE_USER.search(username):
         return "Username must be at least 5 characters and contain 5 letters."
     return None
 
@@ -120,201 +251,262 @@ def validate_password(password):
     """Password must be >= 5 chars, have alpha, numeric, and one of $, %, *, @."""
     if len(password) < 5:
         return "Password must be at least 5 characters long."
-    if not re.search(r'[a-zA-Z]', password):
+    if not _RE_ALPHA.search(password):
         return "Password must contain at least one alphabet character."
-    if not re.search(r'\d', password):
+    if not _RE_DIGIT.search(password):
         return "Password must contain at least one numeric digit."
-    if not re.search(r'[\$%\*@]', password):
+    if not _RE_SPECIAL.search(password):
         return "Password must contain one of the special characters: $, %, *, or @."
     return None
 
+_URL_CACHE = {}
+
+def cached_url_for(endpoint):
+    """url_for() for endpoints without arguments, resolved on first use and then reused."""
+    url = _URL_CACHE.get(endpoint)
+    if url is None:
+        url = _URL_CACHE[endpoint] = url_for(endpoint)
+    return url
+
+def admin_required(view):
+    """Redirects non-admin users to the index page."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not session.get('is_admin'):
+            return redirect(cached_url_for('index'))
+        return view(*args, **kwargs)
+    return wrapped
+
 def get_today_date():
-    """Returns today's date in 'YYYY-MM-DD' format."""
-    return date.today().strftime('%Y-%m-%d')
+    """Returns today's date in 'YYYY-MM-DD' format, computed once per request."""
+    today = getattr(g, '_today', None)
+    if today is None:
+        today = g._today = date.today().strftime('%Y-%m-%d')
+    return today
 
-def get_games_played_today(user_id):
+def get_games_played_today(user_id, db=None):
     """Checks how many games the user has played today."""
-    db = get_db_connection()
-    cursor = db.cursor()
-    today = get_today_date()
-    cursor.execute(
+    return _scalar(
         "SELECT COUNT(*) FROM game_history WHERE user_id = ? AND date_played = ?",
-        (user_id, today)
+        (user_id, get_today_date()),
+        db
     )
-    return cursor.fetchone()[0]
+
+# --- Report Queries (Adapted from reports.py) ---
+# History lookups are cached briefly; results are plain tuples so nothing cursor-bound is kept in the cache
+
+def get_daily_stats(report_date):
+    """Returns (unique users, games won, total games) for a date from the trigger-maintained totals."""
+    db = get_db_connection()
+    row = db.execute(
+        "SELECT players, wins, games FROM daily_stats WHERE date_played = ?",
+        (report_date,)
+    ).fetchone()
+    return row or (0, 0, 0)
+
+@cache.memoize(timeout=60)
+def get_user_history(username, resolution):
+    """
+    Returns (period, words_tried, correct_guesses) per day, month or year for a user, newest first,
+    capped at MAX_REPORT_ROWS.
+    An empty list means the user does not exist; a single row with a None period means no games yet.
+    """
+    period = REPORT_RESOLUTIONS[resolution][0]
+    db = get_db_connection()
+    # LEFT JOIN from users so a missing user and a user without games can be told apart
+    return db.execute(
+        f"""
+        SELECT 
+            {period} as period, 
+            COUNT(g.id) as words_tried, 
+            CAST(COALESCE(SUM(g.is_won), 0) AS INTEGER) as correct_guesses
+        FROM users u
+        LEFT JOIN game_history g ON g.user_id = u.id
+        WHERE u.username = ?
+        GROUP BY period
+        ORDER BY period DESC
+        LIMIT ?
+        """,
+        (username, MAX_REPORT_ROWS)
+    ).fetchall()
+
+@cache.cached(timeout=300, key_prefix='all_usernames')
+def all_usernames():
+    """Returns (username, HTML-escaped username) pairs, sorted, for the report's user dropdown."""
+    db = get_db_connection()
+    # Escaped once when the cache is filled rather than on every render
+    return [(username, escape(username)) for (username,) in db.execute("SELECT username FROM users ORDER BY username")]
+
+@cache.cached(timeout=300, key_prefix='user_options_html')
+def user_options_html():
+    """Returns the dropdown's <option> tags with nothing selected; callers mark the chosen user."""
+    return "".join([f'<option value="{escaped}">{escaped}</option>' for _, escaped in all_usernames()])
+
+def invalidate_report_cache():
+    """Drops the cached report entries affected by the current player's games."""
+    for resolution in REPORT_RESOLUTIONS:
+        cache.delete_memoized(get_user_history, session['username'], resolution)
 
 # --- Game Logic (Adapted from game.py) ---
 
+# Feedback color codes and their tailwind classes (yellow is used for orange visibility)
+GREY, ORANGE, GREEN = 0, 1, 2
+_COLORS = ('bg-gray-400', 'bg-yellow-500', 'bg-green-500')
+
 def get_guess_feedback(secret_word, guess):
     """
-    Generates color-coded feedback (tailwind classes) for a guess.
-    Returns a list of dictionaries [{'letter': 'A', 'color': 'bg-green-500'}, ...]
+    Generates color-coded feedback for a guess.
+    Returns a list of (letter, color_code) tuples [('A', GREEN), ...]; _COLORS maps codes to tailwind classes.
     """
     word_length = len(secret_word)
-    secret_list = list(secret_word)
-    feedback_list = []
     
-    # 1. Check for Green (correct letter and position)
-    status = ['GREY'] * word_length
+    # 1. Check for Green (correct letter and position), counting the unmatched secret letters
+    status = [GREY] * word_length
+    counts = [0] * 26
     for i in range(word_length):
         if guess[i] == secret_word[i]:
-            status[i] = 'GREEN'
-            secret_list[i] = None 
-
-    # 2. Check for Orange (correct letter, wrong position)
-    for i in range(word_length):
-        if status[i] != 'GREEN':
-            try:
-                idx = secret_list.index(guess[i])
-                status[i] = 'ORANGE'
-                secret_list[idx] = None
-            except ValueError:
-                status[i] = 'GREY' 
+            status[i] = GREEN
+        else:
+            counts[ord(secret_word[i]) - 65] += 1
 
-    # 3. Format into Tailwind classes
+    # 2. Check for Orange (correct letter, wrong position) against the remaining counts
     for i in range(word_length):
-        letter = guess[i]
-        color_class = 'bg-gray-400' # Grey
-        if status[i] == 'GREEN':
-            color_class = 'bg-green-500' 
-        elif status[i] == 'ORANGE':
-            color_class = 'bg-yellow-500' # Using Yellow for Orange visibility
-        
-        feedback_list.append({'letter': letter, 'color': color_class})
-
-    return feedback_list
+        if status[i] != GREEN:
+            idx = ord(guess[i]) - 65
+            if counts[idx] > 0:
+                status[i] = ORANGE
+                counts[idx] -= 1
+
+    return list(zip(guess, status))
+
+def pack_feedback(feedback):
+    """Packs the color codes of a feedback list into one int (a base-3 digit per letter) for the session."""
+    packed = 0
+    for _, color in reversed(feedback):
+        packed = packed * 3 + color
+    return packed
+
+@app.template_filter('feedback')
+def unpack_feedback(guess_entry):
+    """Expands a session (guess, packed_status) entry back into (letter, color_code) tuples."""
+    guess, packed = guess_entry
+    feedback = []
+    for letter in guess:
+        packed, color = divmod(packed, 3)
+        feedback.append((letter, color))
+    return feedback
 
 def get_random_secret_word():
-    """Fetches a random secret word and its ID from the database."""
-    db = get_db_connection()
-    cursor = db.cursor()
-    cursor.execute("SELECT id, word FROM secret_words ORDER BY RANDOM() LIMIT 1")
-    word_data = cursor.fetchone()
-    if word_data:
-        return word_data['word'], word_data['id']
-    return None, None
+    """Picks a random secret word and its ID from the cached word list."""
+    if not _SECRET_WORD_IDS:
+        return None, None
+    return random.choice(_SECRET_WORD_IDS)
 
-def start_new_game(user_id):
+def start_new_game(user_id, db=None):
     """Starts a new game, saves initial history entry, and returns the history_id and word."""
+    if db is None:
+        db = get_db_connection()
     secret_word, secret_word_id = get_random_secret_word()
     if not secret_word:
         return None, None
 
-    db = get_db_connection()
     cursor = db.cursor()
     cursor.execute(
         "INSERT INTO game_history (user_id, secret_word_id, is_won, date_played) VALUES (?, ?, ?, ?)",
-        (user_id, secret_word_id, 0, get_today_date())
-    )
-    db.commit()
+        (user_id, secret_word_id, False, get_today_date())
+    ) # Autocommits: the connection runs with isolation_level=None
     history_id = cursor.lastrowid
+    invalidate_report_cache()
     
     # Store essential game state in the session
     session['game_active'] = True
     session['history_id'] = history_id
     session['secret_word'] = secret_word
-    session['guesses'] = [] # List of feedback lists (the board history)
+    session['guesses'] = [] # (guess, packed_status) pairs: the board history, written to the DB at game end
     
     return history_id, secret_word
 
-def save_guess_detail(history_id, guess_number, guessed_word):
-    """Saves the user's guess to the GUESS_DETAILS table."""
-    db = get_db_connection()
-    cursor = db.cursor()
-    cursor.execute(
-        "INSERT INTO guess_details (history_id, guess_number, guessed_word) VALUES (?, ?, ?)",
-        (history_id, guess_number, guessed_word)
-    )
-    db.commit()
-
-def update_game_win_status(history_id, is_won):
-    """Updates the game history entry with the final win/loss status."""
-    db = get_db_connection()
+def update_game_win_status(history_id, is_won, db=None):
+    """Writes the game's guesses and the final win/loss status in a single transaction."""
+    if db is None:
+        db = get_db_connection()
     cursor = db.cursor()
-    cursor.execute(
-        "UPDATE game_history SET is_won = ? WHERE id = ?",
-        (1 if is_won else 0, history_id)
-    )
-    db.commit()
+    cursor.execute("BEGIN")
+    try:
+        cursor.executemany(
+            "INSERT INTO guess_details (history_id, guess_number, guessed_word) VALUES (?, ?, ?)",
+            [(history_id, guess_number, guessed_word)
+             for guess_number, (guessed_word, _) in enumerate(session.get('guesses', []), 1)]
+        )
+        cursor.execute(
+            "UPDATE game_history SET is_won = ? WHERE id = ?",
+            (is_won, history_id)
+        )
+        cursor.execute("COMMIT")
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK")
+        raise
+    invalidate_report_cache()
     session['game_active'] = False # End the game
 
-# --- HTML Template (Using Tailwind CSS and Jinja) ---
-
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Guess The Word - {{ title }}</title>
-    <!-- Tailwind CSS CDN -->
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body { font-family: 'Inter', sans-serif; }
-        .grid-cell {
-            width: 48px;
-            height: 48px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: white;
-            border-radius: 0.5rem;
-            transition: all 0.3s ease-in-out;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -2px rgba(0, 0, 0, 0.1);
-        }
-        .container-card {
-            max-width: 450px;
-            width: 95%;
-        }
-    </style>
-</head>
-<body class="bg-gray-100 flex items-center justify-center min-h-screen p-4">
-
-    <div class="container-card bg-white p-8 rounded-xl shadow-2xl">
-        <header class="mb-6 text-center">
-            <h1 class="text-3xl font-extrabold text-indigo-700">
-                {% if username %}{{ username }}'s {% endif %} Guess The Word
-            </h1>
-            <p class="text-sm text-gray-500">
-                {{ subtitle }}
-            </p>
-        </header>
-        
-        <!-- Flash Messages / Notifications -->
-        {% if message %}
-        <div id="message-box" class="p-3 mb-4 text-sm text-white rounded-lg shadow-md 
-            {% if 'success' in message|lower or 'congratulations' in message|lower %} bg-green-500 
-            {% elif 'error' in message|lower or 'fail' in message|lower or 'invalid' in message|lower or 'better luck' in message|lower %} bg-red-500 
-            {% else %} bg-blue-500 
-            {% endif %}">
-            <p>{{ message }}</p>
-        </div>
-        {% endif %}
+# --- HTML Templates (templates/*.html, using Tailwind CSS and Jinja) ---
 
-        <main>
-        {{ content | safe }}
-        </main>
-        
-        <footer class="mt-8 pt-4 border-t border-gray-200 text-center">
-            {% if username %}
-                <a href="{{ url_for('logout') }}" class="text-indigo-600 hover:text-indigo-800 font-medium">
-                    Logout
-                </a>
-                <span class="mx-2 text-gray-400">|</span>
-                <a href="{{ url_for('index') }}" class="text-indigo-600 hover:text-indigo-800 font-medium">
-                    Home
-                </a>
-            {% else %}
-                <p class="text-sm text-gray-500">&copy; 2025 Guess The Word Project</p>
-            {% endif %}
-        </footer>
-    </div>
+# Flask caches compiled templates by name; the bytecode cache also lets a restarted process skip compiling them
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# An unplayed board row is identical for every request, so it is built once
+_EMPTY_ROW = Markup(
+    '<div class="flex justify-center space-x-2">'
+    + '<div class="grid-cell bg-gray-200 border border-gray-300"></div>' * WORD_LENGTH
+    + '</div>'
+)
+
+# Static parts of the admin user report; only the placeholders change between requests
+_USER_REPORT_FORM_HTML = """
+    <h2 class="text-xl font-semibold mb-4 text-gray-700">User History Report</h2>
+    
+    <form method="get" action="{action}" class="mb-6 space-y-4">
+        <label for="username" class="block text-sm font-medium text-gray-700">Select User:</label>
+        <select id="username" name="username" required
+               class="mt-1 block w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500">
+            <option value="">-- Choose a User --</option>
+            {select_options}
+        </select>
+        <label for="resolution" class="block text-sm font-medium text-gray-700">Group By:</label>
+        <select id="resolution" name="resolution"
+               class="mt-1 block w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500">
+            <option value="">Auto</option>
+            {resolution_options}
+        </select>
+        <button type="submit" class="w-full py-2 px-4 rounded-md shadow-sm text-sm font-medium text-white bg-indigo-600 hover:bg-indigo-700">
+            Generate Report
+        </button>
+    </form>
+    """
 
-</body>
-</html>
-"""
+# The history table is filled in by static/user_report.js from the JSON report at data-url
+_REPORT_TABLE_HTML = """
+            <div id="user-report" data-url="{data_url}">
+                <div id="report-message" class="hidden p-3 mt-6 text-sm text-white rounded-lg shadow-md"></div>
+                <div id="report-table" class="hidden">
+                    <h3 class="text-lg font-semibold mt-6 text-gray-700">History for {username}</h3>
+                    <div class="overflow-x-auto">
+                        <table class="min-w-full divide-y divide-gray-200 shadow-md rounded-lg">
+                            <thead class="bg-gray-50">
+                                <tr>
+                                    <th id="report-period" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Date</th>
+                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Words Tried</th>
+                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Correct Guesses</th>
+                                </tr>
+                            </thead>
+                            <tbody id="report-rows" class="bg-white divide-y divide-gray-200"></tbody>
+                        </table>
+                    </div>
+                    <p id="report-footer" class="mt-2 text-xs text-gray-500"></p>
+                </div>
+            </div>
+            <script src="{script_url}"></script>
+        """
 
 # --- Routes ---
 
@@ -344,7 +536,7 @@ def index():
             New user? <a href="{ url_for('register') }" class="font-medium text-indigo-600 hover:text-indigo-500">Register here</a>
         </p>
         """
-        return render_template_string(HTML_TEMPLATE, title="Login/Register", subtitle="Please log in to start playing.", content=content)
+        return render_template('base.html', title="Login/Register", subtitle="Please log in to start playing.", content=Markup(content))
     
     # Logged in: Redirect to appropriate menu
     if session.get('is_admin'):
@@ -370,17 +562,19 @@ def register():
             cursor = db.cursor()
             
             # Determine if this user should be admin (only the first user)
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            is_admin = (user_count == 0)
+            has_user = _scalar("SELECT EXISTS(SELECT 1 FROM users)", db=db)
+            is_admin = not has_user
 
             hashed_password = hash_password(password)
             try:
                 cursor.execute(
                     "INSERT INTO users (username, password_hash, is_admin) VALUES (?, ?, ?)",
-                    (username, hashed_password, 1 if is_admin else 0)
-                )
-                db.commit()
+                    (username, hashed_password, is_admin)
+                ) # Autocommits: the connection runs with isolation_level=None
+                cache.delete_many('all_usernames', 'user_options_html')
+                # A lookup made before the user existed may have cached a not-found report
+                for resolution in REPORT_RESOLUTIONS:
+                    cache.delete_memoized(get_user_history, username, resolution)
                 role = "Admin" if is_admin else "Player"
                 message = f"Success! {role} user registered. Please log in."
             except sqlite3.IntegrityError:
@@ -411,7 +605,7 @@ def register():
         Already have an account? <a href="{ url_for('index') }" class="font-medium text-indigo-600 hover:text-indigo-500">Log In</a>
     </p>
     """
-    return render_template_string(HTML_TEMPLATE, title="Register", subtitle="Create your new account.", content=content, message=message)
+    return render_template('base.html', title="Register", subtitle="Create your new account.", content=Markup(content), message=message)
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -420,11 +614,15 @@ def login():
     password = request.form['password'].strip()
     db = get_db_connection()
     cursor = db.cursor()
+    cursor.row_factory = sqlite3.Row
 
     cursor.execute("SELECT id, username, password_hash, is_admin FROM users WHERE username = ?", (username,))
     user = cursor.fetchone()
 
     if user and check_password(password, user['password_hash']):
+        if '$' not in user['password_hash']:
+            # Upgrade legacy SHA-256 hashes now that we have the plaintext
+            cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), user['id']))
         session['user_id'] = user['id']
         session['username'] = user['username']
         session['is_admin'] = user['is_admin'] == 1
@@ -456,13 +654,16 @@ def login():
             New user? <a href="{ url_for('register') }" class="font-medium text-indigo-600 hover:text-indigo-500">Register here</a>
         </p>
         """
-        return render_template_string(HTML_TEMPLATE, title="Login/Register", subtitle="Please log in to start playing.", 
-                                      message="Error: Invalid username or password.",
-                                      content=content)
+        return render_template('base.html', title="Login/Register", subtitle="Please log in to start playing.", 
+                               message="Error: Invalid username or password.",
+                               content=Markup(content))
 
 @app.route('/logout')
 def logout():
     """Clears the session and logs the user out."""
+    if session.get('game_active'):
+        # Abandoned game: persist the guesses made so far and record it as lost
+        update_game_win_status(session['history_id'], False)
     session.clear()
     return redirect(url_for('index'))
 
@@ -517,7 +718,7 @@ def player_dashboard():
     </div>
     """
 
-    return render_template_string(HTML_TEMPLATE, title="Player Dashboard", subtitle=f"Welcome, {session['username']}!", content=content, username=session['username'], message=message)
+    return render_template('base.html', title="Player Dashboard", subtitle=f"Welcome, {session['username']}!", content=Markup(content), username=session['username'], message=message)
 
 @app.route('/start_game', methods=['POST'])
 def start_game():
@@ -525,13 +726,18 @@ def start_game():
     if not session.get('user_id') or session.get('is_admin'):
         return redirect(url_for('index'))
 
-    games_played = get_games_played_today(session['user_id'])
+    db = get_db_connection()
+    games_played = get_games_played_today(session['user_id'], db)
     if games_played >= MAX_DAILY_GAMES:
         # Save a message before redirecting back
         session['game_message'] = f"Error: You have reached the daily limit of {MAX_DAILY_GAMES} games."
         return redirect(url_for('player_dashboard')) 
 
-    history_id, secret_word = start_new_game(session['user_id'])
+    # Flush an unfinished game as lost before its session state is replaced
+    if session.get('game_active'):
+        update_game_win_status(session['history_id'], False, db)
+
+    history_id, secret_word = start_new_game(session['user_id'], db)
     
     if history_id:
         return redirect(url_for('game'))
@@ -556,13 +762,13 @@ def game():
     if request.method == 'POST':
         guess_input = request.form['guess'].strip().upper()
         
-        if len(guess_input) != WORD_LENGTH or not guess_input.isalpha():
+        if len(guess_input) != WORD_LENGTH or not (guess_input.isascii() and guess_input.isalpha()):
             message = f"Error: Please enter exactly {WORD_LENGTH} uppercase letters."
         else:
             current_guess_count += 1
             feedback = get_guess_feedback(secret_word, guess_input)
-            guesses.append(feedback)
-            save_guess_detail(history_id, current_guess_count, guess_input)
+            guesses.append((guess_input, pack_feedback(feedback)))
+            session['guesses'] = guesses
 
             if guess_input == secret_word:
                 update_game_win_status(history_id, True)
@@ -575,24 +781,9 @@ def game():
                 # Store the message in the session before redirecting
                 session['game_message'] = f"😔 Better luck next time! The word was: {secret_word}"
                 return redirect(url_for('player_dashboard'))
-            
-            session['guesses'] = guesses # Update session after processing
 
     # Generate the board display
-    board_html = '<div class="space-y-2">'
-    for i in range(MAX_GUESSES):
-        board_html += '<div class="flex justify-center space-x-2">'
-        if i < len(guesses):
-            # Display past guess feedback
-            for cell in guesses[i]:
-                board_html += f'<div class="grid-cell {cell["color"]}">{cell["letter"]}</div>'
-        else:
-            # Display empty slots
-            for j in range(WORD_LENGTH):
-                board_html += '<div class="grid-cell bg-gray-200 border border-gray-300"></div>'
-        board_html += '</div>'
-    board_html += '</div>'
-
+    board_html = get_template_attribute('base.html', 'board')(guesses, MAX_GUESSES, _EMPTY_ROW, _COLORS)
 
     # Game Input Form
     input_form = f"""
@@ -616,16 +807,14 @@ def game():
     {input_form}
     """
 
-    return render_template_string(HTML_TEMPLATE, title="Play Game", subtitle="Guess the 5-letter word", content=content, username=session['username'], message=message)
+    return render_template('base.html', title="Play Game", subtitle="Guess the 5-letter word", content=Markup(content), username=session['username'], message=message)
 
 # --- Admin Routes (Adapted from reports.py) ---
 
 @app.route('/admin')
+@admin_required
 def admin_dashboard():
     """Admin Dashboard menu."""
-    if not session.get('is_admin'):
-        return redirect(url_for('index'))
-    
     # FIX: Converted to f-string to use url_for directly and fix the 404 error
     content = f"""
     <h2 class="text-xl font-semibold mb-4 text-gray-700">Admin Dashboard</h2>
@@ -638,199 +827,139 @@ def admin_dashboard():
         </a>
     </div>
     """
-    return render_template_string(HTML_TEMPLATE, title="Admin Dashboard", subtitle=f"Welcome, Admin {session['username']}!", content=content, username=session['username'])
+    return render_template('base.html', title="Admin Dashboard", subtitle=f"Welcome, Admin {session['username']}!", content=Markup(content), username=session['username'])
 
 @app.route('/admin/daily_report', methods=['GET', 'POST'])
+@admin_required
 def admin_daily_report_view():
     """Admin daily report generation and display."""
-    if not session.get('is_admin'):
-        return redirect(url_for('index'))
-    
     report_date = request.args.get('date') or get_today_date()
-    db = get_db_connection()
-    cursor = db.cursor()
-
-    # 1. Number of unique users who played
-    cursor.execute(
-        "SELECT COUNT(DISTINCT user_id) FROM game_history WHERE date_played = ?", (report_date,)
-    )
-    num_users = cursor.fetchone()[0]
-
-    # 2. Number of correct guesses (games won)
-    cursor.execute(
-        "SELECT COUNT(*) FROM game_history WHERE date_played = ? AND is_won = 1", (report_date,)
+    num_users, num_correct_guesses, total_games = get_daily_stats(report_date)
+
+    content = render_template(
+        'daily_report.html',
+        report_date=report_date,
+        num_users=num_users,
+        num_correct_guesses=num_correct_guesses,
+        total_games=total_games
     )
-    num_correct_guesses = cursor.fetchone()[0]
+    return render_template('base.html', title="Daily Report", subtitle="View daily game statistics.", content=Markup(content), username=session['username'])
 
-    # 3. Total games played
-    cursor.execute(
-        "SELECT COUNT(*) FROM game_history WHERE date_played = ?", (report_date,)
-    )
-    total_games = cursor.fetchone()[0]
-
-    content = f"""
-    <h2 class="text-xl font-semibold mb-4 text-gray-700">Daily Report: {report_date}</h2>
-    
-    <form method="get" action="{ url_for('admin_daily_report_view') }" class="mb-6 flex space-x-2">
-        <input type="date" name="date" value="{report_date}" 
-               class="p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500">
-        <button type="submit" class="py-2 px-4 rounded-md shadow-sm text-sm font-medium text-white bg-indigo-600 hover:bg-indigo-700">
-            View
-        </button>
-    </form>
-
-    <div class="space-y-4">
-        <div class="bg-indigo-50 p-4 rounded-lg shadow">
-            <p class="text-sm font-medium text-indigo-700">Unique Users Played</p>
-            <p class="text-3xl font-bold text-indigo-900">{num_users}</p>
-        </div>
-        <div class="bg-green-50 p-4 rounded-lg shadow">
-            <p class="text-sm font-medium text-green-700">Correct Guesses (Wins)</p>
-            <p class="text-3xl font-bold text-green-900">{num_correct_guesses}</p>
-        </div>
-        <div class="bg-gray-50 p-4 rounded-lg shadow">
-            <p class="text-sm font-medium text-gray-700">Total Games Played</p>
-            <p class="text-3xl font-bold text-gray-900">{total_games}</p>
-        </div>
-    </div>
-    """
-    return render_template_string(HTML_TEMPLATE, title="Daily Report", subtitle="View daily game statistics.", content=content, username=session['username'])
+def _report_resolution(args):
+    """Returns the requested report resolution, or None for auto (daily, or monthly for long histories)."""
+    resolution = args.get('resolution')
+    return resolution if resolution in REPORT_RESOLUTIONS else None
 
 @app.route('/admin/user_report', methods=['GET', 'POST'])
+@admin_required
 def admin_user_report_view():
     """Admin user history report generation and display."""
-    if not session.get('is_admin'):
-        return redirect(url_for('index'))
-    
-    db = get_db_connection()
-    cursor = db.cursor()
-    cursor.execute("SELECT username FROM users ORDER BY username")
-    all_users = [row['username'] for row in cursor.fetchall()]
-
     target_username = request.args.get('username')
-    report_data = []
-    message = None
-
-    if target_username:
-        cursor.execute("SELECT id FROM users WHERE username = ?", (target_username,))
-        user_data = cursor.fetchone()
-        
-        if user_data:
-            user_id = user_data['id']
-            cursor.execute(
-                """
-                SELECT 
-                    date_played, 
-                    COUNT(id) as words_tried, 
-                    SUM(is_won) as correct_guesses
-                FROM game_history
-                WHERE user_id = ?
-                GROUP BY date_played
-                ORDER BY date_played DESC
-                """,
-                (user_id,)
-            )
-            report_data = cursor.fetchall()
-            if not report_data:
-                 message = f"Info: No game history found for user '{target_username}'."
-        else:
-            message = f"Error: User '{target_username}' not found."
-
+    resolution = _report_resolution(request.args)
 
     # User selection dropdown
-    select_options = "".join(f'<option value="{user}" {"selected" if user == target_username else ""}>{user}</option>' for user in all_users)
+    select_options = user_options_html()
+    if target_username:
+        needle = f'value="{escape(target_username)}">'
+        select_options = select_options.replace(needle, needle[:-1] + ' selected>', 1)
     
-    # Base content (Form)
-    content = f"""
-    <h2 class="text-xl font-semibold mb-4 text-gray-700">User History Report</h2>
+    resolution_options = "".join([
+        f'<option value="{key}" {"selected" if key == resolution else ""}>{label}</option>'
+        for key, (_, label) in REPORT_RESOLUTIONS.items()
+    ])
     
-    <form method="get" action="{ url_for('admin_user_report_view') }" class="mb-6 space-y-4">
-        <label for="username" class="block text-sm font-medium text-gray-700">Select User:</label>
-        <select id="username" name="username" required
-               class="mt-1 block w-full p-2 border border-gray-300 rounded-md shadow-sm focus:ring-indigo-500 focus:border-indigo-500">
-            <option value="">-- Choose a User --</option>
-            {select_options}
-        </select>
-        <button type="submit" class="w-full py-2 px-4 rounded-md shadow-sm text-sm font-medium text-white bg-indigo-600 hover:bg-indigo-700">
-            Generate Report
-        </button>
-    </form>
-    """
-    
-    # FIX: Build the dynamic report table using Python f-strings if data exists
-    report_table_html = ""
-    if report_data:
-        table_rows = ""
-        for row in report_data:
-            table_rows += f"""
-                <tr>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{row['date_played']}</td>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{row['words_tried']}</td>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{row['correct_guesses']}</td>
-                </tr>
-            """
-        
-        report_table_html = f"""
-            <h3 class="text-lg font-semibold mt-6 text-gray-700">History for {target_username}</h3>
-            <div class="overflow-x-auto">
-                <table class="min-w-full divide-y divide-gray-200 shadow-md rounded-lg">
-                    <thead class="bg-gray-50">
-                        <tr>
-                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Date</th>
-                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Words Tried</th>
-                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Correct Guesses</th>
-                        </tr>
-                    </thead>
-                    <tbody class="bg-white divide-y divide-gray-200">
-                        {table_rows}
-                    </tbody>
-                </table>
-            </div>
-        """
+    # Base content (Form)
+    content = _USER_REPORT_FORM_HTML.format(
+        action=cached_url_for('admin_user_report_view'),
+        select_options=select_options,
+        resolution_options=resolution_options
+    )
     
-    # Concatenate the form content and the table content
-    content += report_table_html
-
-    # The final render call now only needs the fully built content
-    return render_template_string(
-        HTML_TEMPLATE, 
+    # Report shell; the rows are fetched from admin_user_report_json by the browser
+    if target_username:
+        content += _REPORT_TABLE_HTML.format(
+            data_url=escape(url_for('admin_user_report_json', username=target_username, resolution=resolution)),
+            username=escape(target_username),
+            script_url=url_for('static', filename='user_report.js')
+        )
+
+    return render_template(
+        'base.html',
         title="User Report", 
         subtitle="View user-specific game history.", 
-        content=content, 
-        username=session['username'], 
-        message=message
+        content=Markup(content), 
+        username=session['username']
     )
 
-@app.route('/debug_routes')
-def debug_routes():
-    """Displays all routes registered with the Flask application."""
-    # Ensure this route is accessible even if the user is not logged in
-    output = []
-    for rule in app.url_map.iter_rules():
-        # Exclude internal routes like static if you only want user-facing ones
-        if 'static' not in rule.endpoint:
-            methods = ','.join(rule.methods)
-            output.append(f'<li><code class="font-mono text-xs bg-gray-200 p-1 rounded">Endpoint: {rule.endpoint}</code> | <code class="font-mono text-xs bg-gray-200 p-1 rounded">Rule: {rule}</code> | <code class="font-mono text-xs bg-gray-200 p-1 rounded">Methods: {methods}</code></li>')
+@app.route('/admin/user_report.json')
+@admin_required
+def admin_user_report_json():
+    """Returns a user's history report as JSON, tagged with an ETag so unchanged polls get a 304."""
+    target_username = request.args.get('username', '')
+    resolution = _report_resolution(request.args)
+    shown_resolution = resolution or 'day'
+
+    report_data = get_user_history(target_username, shown_resolution)
+    if resolution is None and len(report_data) > MAX_DAILY_REPORT_ROWS:
+        shown_resolution = 'month'
+        report_data = get_user_history(target_username, shown_resolution)
+
+    message = None
+    if not report_data:
+        message = f"Error: User '{target_username}' not found."
+    elif report_data[0][0] is None:
+        report_data = []
+        message = f"Info: No game history found for user '{target_username}'."
+
+    response = jsonify(
+        username=target_username,
+        period_label=REPORT_RESOLUTIONS[shown_resolution][1],
+        rows=report_data,
+        max_rows=MAX_REPORT_ROWS,
+        message=message
+    )
+    if message and message.startswith('Error'):
+        response.status_code = 404
+    # Always revalidate; an unchanged report then costs only a 304
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=8).hexdigest())
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+_ROUTE_ITEM_HTML = '<li><code class="font-mono text-xs bg-gray-200 p-1 rounded">Endpoint: %s</code> | <code class="font-mono text-xs bg-gray-200 p-1 rounded">Rule: %s</code> | <code class="font-mono text-xs bg-gray-200 p-1 rounded">Methods: %s</code></li>'
+
+@lru_cache(maxsize=1)
+def _debug_routes_html():
+    """Builds the route listing once; the URL map does not change after startup."""
+    # Exclude internal routes like static if you only want user-facing ones
+    output = "\n".join([
+        _ROUTE_ITEM_HTML % (rule.endpoint, rule.rule, ','.join(sorted(rule.methods - {'HEAD', 'OPTIONS'})))
+        for rule in app.url_map.iter_rules()
+        if 'static' not in rule.endpoint
+    ])
 
     content = f"""
     <h2 class="text-xl font-semibold mb-4 text-gray-700">DEBUG: Flask Routes</h2>
     <p class="mb-4 text-gray-600">Checking server configuration. **The '/register', '/admin/daily_report', and '/admin/user_report' routes must be visible below.**</p>
     <ul class="list-disc list-inside space-y-2 text-sm text-gray-700">
-        {''.join(output)}
+        {output}
     </ul>
     <p class="mt-8"><a href="{ url_for('index') }" class="text-indigo-600 hover:text-indigo-800 font-medium">Back to Login</a></p>
     """
-    return render_template_string(HTML_TEMPLATE, title="Routes Debugger", subtitle="Confirming server endpoints.", content=content)
+    return Markup(content)
+
+@app.route('/debug_routes')
+def debug_routes():
+    """Displays all routes registered with the Flask application."""
+    # Ensure this route is accessible even if the user is not logged in
+    return render_template('base.html', title="Routes Debugger", subtitle="Confirming server endpoints.", content=_debug_routes_html())
 
 
 if __name__ == '__main__':
     # Running directly (for development/testing outside the environment)
+    # With debug=True the reloader runs this module again in a child process; only list the routes there.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Exclude static route for clarity; one print call for the whole listing
+        routes = [f"Endpoint: {rule.endpoint:<20} | Rule: {rule}" for rule in app.url_map.iter_rules() if 'static' not in rule.endpoint]
+        print("\n".join(["--- DEBUG: Registered Routes ---", *routes, "---------------------------------"]))
     # This line is NECESSARY to start the web server if running locally.
-    print("--- DEBUG: Registered Routes ---")
-    with app.app_context(): # Ensure url_for works in the debug print block
-        for rule in app.url_map.iter_rules():
-            # Exclude static route for clarity
-            if 'static' not in rule.endpoint:
-                print(f"Endpoint: {rule.endpoint:<20} | Rule: {rule}")
-    print("---------------------------------")
     app.run(debug=True)
@@ -0,0 +1,47 @@
+// Fills in the admin user history table from the JSON report (see admin_user_report_json).
+(function () {
+    var report = document.getElementById('user-report');
+    if (!report) {
+        return;
+    }
+
+    function showMessage(text) {
+        var box = document.getElementById('report-message');
+        box.textContent = text;
+        box.classList.add(text.indexOf('Error') === 0 ? 'bg-red-500' : 'bg-blue-500');
+        box.classList.remove('hidden');
+    }
+
+    function cell(value, className) {
+        var td = document.createElement('td');
+        td.className = 'px-6 py-4 whitespace-nowrap text-sm ' + className;
+        td.textContent = value;
+        return td;
+    }
+
+    fetch(report.dataset.url, { credentials: 'same-origin' })
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+            if (data.message) {
+                showMessage(data.message);
+            }
+            if (!data.rows.length) {
+                return;
+            }
+            var tbody = document.getElementById('report-rows');
+            data.rows.forEach(function (row) {
+                var tr = document.createElement('tr');
+                tr.appendChild(cell(row[0], 'font-medium text-gray-900'));
+                tr.appendChild(cell(row[1], 'text-gray-500'));
+                tr.appendChild(cell(row[2], 'text-gray-500'));
+                tbody.appendChild(tr);
+            });
+            document.getElementById('report-period').textContent = data.period_label;
+            document.getElementById('report-footer').textContent =
+                'Showing the last ' + data.rows.length + ' entries (at most ' + data.max_rows + ').';
+            document.getElementById('report-table').classList.remove('hidden');
+        })
+        .catch(function () {
+            showMessage('Error: Could not load the report.');
+        });
+})();